@@ -5,11 +5,23 @@ try:
     from importlib import reload
 except ImportError:
     pass
+from . import shapes
+from . import catalog
+from . import undoable
 from . import control
+from . import coloring
 from . import constraints
+from . import rename
 from . import tools
+from . import atlas
 from . import ui
+reload(shapes)
+reload(catalog)
+reload(undoable)
 reload(control)
+reload(coloring)
 reload(constraints)
+reload(rename)
 reload(tools)
+reload(atlas)
 reload(ui)
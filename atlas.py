@@ -0,0 +1,119 @@
+"""
+Thumbnail atlas cache
+Shape thumbnails and color swatches are packed into one png in the per-user cache folder,
+the tile index is stored in the png text, so the browser opens with a single file read.
+Tiles are checked against catalog modified times and only changed shapes are redrawn.
+"""
+try:
+    from PySide2.QtGui import *
+    from PySide2.QtCore import *
+except ImportError:
+    from PySide6.QtGui import *
+    from PySide6.QtCore import *
+
+import json
+import os
+
+from . import catalog
+from .coloring import index_rgb_map
+
+ATLAS_PATH = os.path.join(catalog.CACHE_PATH, "atlas.png")
+TILE = 64
+COLUMNS = 16
+SWATCH = (32, 16)
+
+# (index, QPixmap) of the last load
+_cache = None
+
+
+def get_tile_rect(index):
+    # shape tiles start under the swatch row
+    return QRect(index % COLUMNS * TILE, SWATCH[1] + index // COLUMNS * TILE, TILE, TILE)
+
+
+def get_swatch_rect(index):
+    return QRect(index * SWATCH[0], 0, SWATCH[0], SWATCH[1])
+
+
+def read_atlas(path=ATLAS_PATH):
+    # return (index, image), index is None when the file is missing or broken
+    image = QImage(path)
+    if image.isNull():
+        return None, image
+    try:
+        return json.loads(image.text("index")), image
+    except ValueError:
+        return None, image
+
+
+def is_valid(index, stamps):
+    # stamps is {name: [root, modified]} from catalog
+    return (index is not None and index.get("palette") == index_rgb_map and
+            {name: entry[1:] for name, entry in index["shapes"].items()} == stamps)
+
+
+def build(stamps, shape_catalog, index=None, image=None):
+    """
+    build atlas image for stamps, tiles of unchanged shapes are copied from the old image
+    return (index, image)
+    """
+    old = index["shapes"] if index is not None and not image.isNull() else {}
+    names = sorted(stamps)
+    rows = (len(names) + COLUMNS - 1) // COLUMNS
+    atlas = QImage(COLUMNS * TILE, SWATCH[1] + rows * TILE, QImage.Format_ARGB32)
+    atlas.fill(Qt.transparent)
+
+    painter = QPainter(atlas)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+    for i, rgb in enumerate(index_rgb_map):
+        painter.fillRect(get_swatch_rect(i), QColor.fromRgbF(*rgb))
+
+    shapes = {}
+    for i, name in enumerate(names):
+        rect = get_tile_rect(i)
+        shapes[name] = [i] + list(stamps[name])
+        if name in old and old[name][1:] == list(stamps[name]):
+            # unchanged shape, reuse its tile
+            painter.drawImage(rect, image, get_tile_rect(old[name][0]))
+            continue
+        thumbnail = shape_catalog.get_thumbnail(name)
+        tile = QImage()
+        if thumbnail is not None and tile.loadFromData(bytes(thumbnail)):
+            painter.drawImage(rect, tile.scaled(TILE, TILE, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    painter.end()
+
+    index = dict(palette=index_rgb_map, shapes=shapes)
+    atlas.setText("index", json.dumps(index))
+    return index, atlas
+
+
+def load(shape_catalog=None, path=ATLAS_PATH):
+    """
+    return (index, QPixmap) of an atlas matching the catalog, rebuilt and saved if outdated
+    """
+    global _cache
+    shape_catalog = shape_catalog or catalog.get_catalog()
+    stamps = {name: [root, modified] for name, root, modified in shape_catalog.stamps()}
+    if _cache is not None and is_valid(_cache[0], stamps):
+        return _cache
+
+    index, image = read_atlas(path)
+    if not is_valid(index, stamps):
+        index, image = build(stamps, shape_catalog, index, image)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        image.save(path, "PNG")
+    _cache = index, QPixmap.fromImage(image)
+    return _cache
+
+
+def get_shape_icons():
+    # [(name, QPixmap)] sliced from the atlas in catalog order
+    index, pixmap = load()
+    return [(name, pixmap.copy(get_tile_rect(entry[0])))
+            for name, entry in sorted(index["shapes"].items(), key=lambda item: item[1][0])]
+
+
+def get_color_swatches():
+    index, pixmap = load()
+    return [pixmap.copy(get_swatch_rect(i)) for i in range(len(index["palette"]))]
@@ -0,0 +1,216 @@
+"""
+Headless library maintenance, run from plain python or mayapy without a maya session
+    python controlLib/batch.py validate
+    mayapy controlLib/batch.py thumbnails --root //server/controls --jobs 8
+Every json file is processed in a process pool, progress and per-file time are printed
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    from . import catalog
+    from . import shapes
+except ImportError:
+    # run as a script, package folder is on sys.path
+    import catalog
+    import shapes
+
+# camera rotation used by upload_control playblast
+CAMERA_ROTATE = (-27.938, 45, 0)
+THUMBNAIL_SIZE = 128
+
+_application = None
+
+
+def list_files(roots):
+    files = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        files.extend(os.path.join(root, file_name) for file_name in sorted(os.listdir(root))
+                     if file_name.endswith(".json"))
+    return files
+
+
+def validate_file(path):
+    return shapes.check(shapes.read_shape(path)), None
+
+
+def encode_file(path):
+    # rewrite json with the upload_control layout
+    shape = shapes.read_shape(path)
+    errors = shapes.check(shape)
+    if not errors:
+        shapes.write_shape(path, shape)
+    return errors, None
+
+
+def normalize_file(path, center=False, unit=False):
+    # strip periodic wrap cvs, optionally recenter and scale to unit radius
+    shape = shapes.normalize(shapes.read_shape(path), center=center, unit=unit)
+    errors = shapes.check(shape)
+    if not errors:
+        shapes.write_shape(path, shape)
+    return errors, None
+
+
+def lod_file(path, tolerance=0.05, level=1):
+    # write simplified "name.lodN.json" beside the shape, level 0 is the shape itself
+    if level < 1:
+        return ["lod level must be 1 or more, got {0}".format(level)], None
+    name = os.path.splitext(os.path.basename(path))[0]
+    if catalog.is_lod(name):
+        return [], None
+    shape = shapes.read_shape(path)
+    simple, error = shapes.simplify(shape, tolerance)
+    counts = [len(data["points"]) // 3 for data in shape], [len(data["points"]) // 3 for data in simple]
+    # a variant without fewer cvs would be a copy of the shape
+    if counts[0] == counts[1]:
+        return [], "cvs {0} unchanged, no lod written".format(counts[0])
+    errors = shapes.check(simple)
+    if not errors:
+        shapes.write_shape(os.path.join(os.path.dirname(path), catalog.lod_name(name, level) + ".json"), simple)
+    return errors, "cvs {0} -> {1}, error {2:.4f}".format(counts[0], counts[1], error)
+
+
+def index_file(path):
+    # read everything the catalog needs, database is written by the main process
+    # same normalize, check and stamp as a catalog folder sync, so opening the catalog reads nothing again
+    shape, errors = catalog.read_shape(path)
+    thumbnail = None
+    jpg_file = os.path.splitext(path)[0] + ".jpg"
+    if os.path.isfile(jpg_file):
+        with open(jpg_file, "rb") as fp:
+            thumbnail = fp.read()
+    root, name = os.path.split(os.path.splitext(path)[0])
+    return errors, (name, shape, thumbnail, catalog.get_stamp(root, name))
+
+
+def project(point):
+    # rotate point into camera space, inverse of maya xyz rotate order
+    rx, ry = [-math.radians(angle) for angle in CAMERA_ROTATE[:2]]
+    x, y, z = point
+    x, z = x * math.cos(ry) + z * math.sin(ry), z * math.cos(ry) - x * math.sin(ry)
+    y = y * math.cos(rx) - z * math.sin(rx)
+    return x, y
+
+
+def thumbnail_file(path):
+    # draw evaluated curves with Qt, playblast is not available in batch mode
+    try:
+        from PySide2.QtCore import QPointF, Qt
+        from PySide2.QtGui import QColor, QGuiApplication, QImage, QPainter, QPen, QPolygonF
+    except ImportError:
+        from PySide6.QtCore import QPointF, Qt
+        from PySide6.QtGui import QColor, QGuiApplication, QImage, QPainter, QPen, QPolygonF
+    global _application
+    _application = QGuiApplication.instance() or QGuiApplication([sys.argv[0], "-platform", "offscreen"])
+
+    shape = shapes.read_shape(path)
+    errors = shapes.check(shape)
+    if errors:
+        return errors, None
+    polylines = [[project(point) for point in shapes.evaluate(data)] for data in shape]
+    points = sum(polylines, [])
+    if not points:
+        return ["no curve to draw"], None
+
+    # fit curves in image with margin, flip y to image space
+    xs, ys = [p[0] for p in points], [p[1] for p in points]
+    center_x, center_y = (max(xs) + min(xs)) / 2.0, (max(ys) + min(ys)) / 2.0
+    size = max(max(xs) - min(xs), max(ys) - min(ys)) or 1.0
+    scale = THUMBNAIL_SIZE * 0.85 / size
+
+    image = QImage(THUMBNAIL_SIZE, THUMBNAIL_SIZE, QImage.Format_RGB32)
+    image.fill(QColor(99, 99, 99))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(QPen(QColor(0, 4, 96), 1.5, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+    for polyline in polylines:
+        painter.drawPolyline(QPolygonF([QPointF(THUMBNAIL_SIZE / 2.0 + (x - center_x) * scale,
+                                                THUMBNAIL_SIZE / 2.0 - (y - center_y) * scale)
+                                        for x, y in polyline]))
+    painter.end()
+    if not image.save(os.path.splitext(path)[0] + ".jpg", "JPG", 100):
+        return ["failed to write thumbnail"], None
+    return [], None
+
+
+TASKS = dict(validate=validate_file, encode=encode_file, normalize=normalize_file,
+             thumbnails=thumbnail_file, lod=lod_file, index=index_file)
+
+
+def run_task(task, path, options):
+    # worker entry, time one file and turn exceptions into errors
+    start = time.time()
+    try:
+        errors, result = TASKS[task](path, **options)
+    except Exception as e:
+        errors, result = ["{0}: {1}".format(type(e).__name__, e)], None
+    return path, errors, result, time.time() - start
+
+
+def run(task, roots, jobs=None, db_path=catalog.DB_PATH, **options):
+    """
+    run task on every json file of roots, return failed file count
+    options are sent to the task function, such as center and unit of normalize, tolerance and level of lod
+    """
+    roots = [catalog.normpath(root) for root in roots]
+    files = list_files(roots)
+    entries = {root: [] for root in roots}
+    failed = 0
+    cost = 0.0
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_task, task, path, options) for path in files]
+        for count, future in enumerate(as_completed(futures), 1):
+            path, errors, result, seconds = future.result()
+            cost += seconds
+            failed += bool(errors)
+            print("[{0}/{1}] {2:.3f}s {3} {4}".format(count, len(files), seconds, "FAIL" if errors else "ok", path))
+            for error in errors:
+                print("    " + error)
+            # tasks may return a note instead of data
+            if isinstance(result, str):
+                print("    " + result)
+            elif result is not None and not errors:
+                entries[os.path.dirname(path)].append(result)
+
+    if task == "index":
+        shape_catalog = catalog.Catalog(db_path)
+        for root in roots:
+            shape_catalog.rebuild_root(root, entries[root])
+        shape_catalog.close()
+
+    print("{0} files, {1} failed, {2:.2f}s wall time, {3:.2f}s file time".format(
+        len(files), failed, time.time() - start, cost))
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="control library maintenance")
+    parser.add_argument("task", choices=sorted(TASKS))
+    parser.add_argument("--root", action="append", help="library root, default to catalog search paths")
+    parser.add_argument("--jobs", type=int, help="worker process count, default to cpu count")
+    parser.add_argument("--db", default=catalog.DB_PATH, help="catalog file rebuilt by the index task")
+    parser.add_argument("--center", action="store_true", help="normalize: move shape center to origin")
+    parser.add_argument("--unit", action="store_true", help="normalize: scale shape to radius 1")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="lod: largest deviation from the shape")
+    parser.add_argument("--level", type=int, default=1, help="lod: variant level to write")
+    args = parser.parse_args(argv)
+    if args.level < 1:
+        parser.error("--level must be 1 or more, level 0 is the source shape")
+    options = {}
+    if args.task == "normalize":
+        options = dict(center=args.center, unit=args.unit)
+    elif args.task == "lod":
+        options = dict(tolerance=args.tolerance, level=args.level)
+    return 1 if run(args.task, args.root or catalog.search_paths(), args.jobs, args.db, **options) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
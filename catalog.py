@@ -0,0 +1,312 @@
+"""
+Shape catalog stored in a local sqlite file
+Every library root (a folder of json/jpg pairs) is indexed into one database,
+roots are merged by priority so a studio library can override the package one
+"""
+import getpass
+import json
+import os
+import re
+import sqlite3
+import time
+
+try:
+    from . import shapes
+except ImportError:
+    # imported by batch and propagate scripts, package folder is on sys.path
+    import shapes
+
+DATA_PATH = os.path.abspath(__file__ + "/../data")
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".controlLib")
+DB_PATH = os.path.join(CACHE_PATH, "catalog.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shapes (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    thumbnail BLOB,
+    author TEXT,
+    created REAL,
+    modified REAL,
+    UNIQUE (root, name)
+);
+CREATE INDEX IF NOT EXISTS shapes_name ON shapes (name);
+CREATE TABLE IF NOT EXISTS tags (
+    shape INTEGER NOT NULL REFERENCES shapes (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    UNIQUE (shape, tag)
+);
+CREATE INDEX IF NOT EXISTS tags_tag ON tags (tag);
+"""
+
+# active roots joined to shapes, lowest priority number wins
+ACTIVE = "FROM shapes s JOIN roots r ON r.path = s.root WHERE r.priority >= 0"
+# lod variants are hidden from shape lists
+BASE = " AND s.name NOT GLOB '*.lod[0-9]*'"
+
+
+def normpath(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def lod_name(name, level):
+    # lod variants are stored as shapes "name.lod1", maya node names never contain "."
+    return "{0}.lod{1}".format(name, level) if level else name
+
+
+def is_lod(name):
+    return re.search(r"\.lod\d+$", name) is not None
+
+
+def base_name(name):
+    # shape name without lod suffix
+    return re.sub(r"\.lod\d+$", "", name)
+
+
+def get_stamp(root, name, thumbnail=True):
+    # modified time of a library shape, the newest of its json and jpg files
+    stamp = os.path.getmtime(os.path.join(root, name + ".json"))
+    if thumbnail and os.path.isfile(os.path.join(root, name + ".jpg")):
+        stamp = max(stamp, os.path.getmtime(os.path.join(root, name + ".jpg")))
+    return stamp
+
+
+def read_shape(path):
+    # return (clean shape data, errors) of a library json file, data is None if it is invalid
+    try:
+        data = shapes.normalize(shapes.read_shape(path))
+    except (KeyError, TypeError, ValueError) as e:
+        return None, ["{0}: {1}".format(type(e).__name__, e)]
+    errors = shapes.check(data)
+    return (None if errors else data), errors
+
+
+def search_paths():
+    # roots from CONTROLLIB_PATH in priority order, package data folder always comes last
+    paths = [path for path in os.environ.get("CONTROLLIB_PATH", "").split(os.pathsep) if path]
+    paths.append(DATA_PATH)
+    result = []
+    for path in map(normpath, paths):
+        if path not in result:
+            result.append(path)
+    return result
+
+
+class Catalog(object):
+    """
+    Catalog param list
+    :param: db_path string                          sqlite file, created if nonexistent
+    :param: paths [str, ...]                        library roots, first one has highest priority
+    """
+    def __init__(self, db_path=DB_PATH, paths=None):
+        # relative file names have no folder part, make it absolute before creating the folder
+        if db_path != ":memory:" and not os.path.isdir(os.path.dirname(os.path.abspath(db_path))):
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)))
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+        self.paths = []
+        self.set_search_paths(paths or search_paths())
+
+    def close(self):
+        self.connection.close()
+
+    def set_search_paths(self, paths):
+        self.paths = [normpath(path) for path in paths]
+        with self.connection:
+            # disable every root, then enable the given ones by order
+            self.connection.execute("UPDATE roots SET priority = -1")
+            for priority, path in enumerate(self.paths):
+                self.connection.execute("INSERT OR IGNORE INTO roots (path, priority) VALUES (?, ?)", (path, priority))
+                self.connection.execute("UPDATE roots SET priority = ? WHERE path = ?", (priority, path))
+        return self
+
+    def get_indexed_roots(self):
+        # roots that already have shapes in the database
+        rows = self.connection.execute("SELECT DISTINCT root FROM shapes")
+        return [row[0] for row in rows]
+
+    def names(self, pattern=None, tag=None):
+        # merged shape names, pattern use sql LIKE syntax
+        query, values = "SELECT s.name, MIN(r.priority) " + ACTIVE + BASE, []
+        if pattern is not None:
+            query += " AND s.name LIKE ?"
+            values.append(pattern)
+        if tag is not None:
+            query += " AND s.id IN (SELECT shape FROM tags WHERE tag = ?)"
+            values.append(tag)
+        query += " GROUP BY s.name ORDER BY s.name"
+        return [row[0] for row in self.connection.execute(query, values)]
+
+    def thumbnails(self):
+        # (name, jpg bytes) for every merged shape, sqlite take bare columns from the MIN row
+        rows = self.connection.execute(
+            "SELECT s.name, s.thumbnail, MIN(r.priority) " + ACTIVE + BASE + " GROUP BY s.name ORDER BY s.name")
+        return [(name, thumbnail) for name, thumbnail, _ in rows]
+
+    def stamps(self):
+        # (name, root, modified) for every merged shape, cheap check of library changes without blobs
+        rows = self.connection.execute(
+            "SELECT s.name, s.root, s.modified, MIN(r.priority) " + ACTIVE + BASE + " GROUP BY s.name ORDER BY s.name")
+        return [(name, root, modified) for name, root, modified, _ in rows]
+
+    def find(self, name):
+        # return (id, root) of the shape which wins the priority, or None
+        return self.connection.execute(
+            "SELECT s.id, s.root " + ACTIVE + " AND s.name = ? ORDER BY r.priority LIMIT 1", (name,)).fetchone()
+
+    def get_shape(self, name):
+        row = self.connection.execute(
+            "SELECT s.data " + ACTIVE + " AND s.name = ? ORDER BY r.priority LIMIT 1", (name,)).fetchone()
+        if row is not None:
+            return json.loads(row[0])
+
+    def get_thumbnail(self, name):
+        row = self.connection.execute(
+            "SELECT s.thumbnail " + ACTIVE + " AND s.name = ? ORDER BY r.priority LIMIT 1", (name,)).fetchone()
+        if row is not None:
+            return row[0]
+
+    def get_info(self, name):
+        row = self.connection.execute(
+            "SELECT s.id, s.root, s.author, s.created, s.modified " + ACTIVE +
+            " AND s.name = ? ORDER BY r.priority LIMIT 1", (name,)).fetchone()
+        if row is None:
+            return
+        tags = [tag for tag, in self.connection.execute("SELECT tag FROM tags WHERE shape = ? ORDER BY tag", row[:1])]
+        return dict(name=name, root=row[1], author=row[2], created=row[3], modified=row[4], tags=tags)
+
+    def add_shape(self, name, data, thumbnail=None, tags=None, author=None, root=None, modified=None):
+        """
+        insert or update a shape in root, default root is the highest priority one
+        thumbnail is jpg bytes, data is the list returned from Control.get_shape
+        """
+        root = normpath(root) if root else self.paths[0]
+        author = getpass.getuser() if author is None else author
+        with self.connection:
+            self._write_shape(root, name, data, thumbnail, author, modified)
+            if tags is not None:
+                self._write_tags(root, name, tags)
+        return self
+
+    def _write_shape(self, root, name, data, thumbnail, author, modified):
+        # write without committing, callers own the transaction
+        # author None keeps the existing author of an updated shape
+        modified = time.time() if modified is None else modified
+        text = json.dumps(data, separators=(",", ":"))
+        thumbnail = sqlite3.Binary(thumbnail) if thumbnail is not None else None
+        # keep created time and id when the shape already exists
+        cursor = self.connection.execute(
+            "UPDATE shapes SET data = ?, thumbnail = COALESCE(?, thumbnail), author = COALESCE(?, author), "
+            "modified = ? WHERE root = ? AND name = ?", (text, thumbnail, author, modified, root, name))
+        if cursor.rowcount == 0:
+            self.connection.execute(
+                "INSERT INTO shapes (root, name, data, thumbnail, author, created, modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (root, name, text, thumbnail, author, modified, modified))
+
+    def _write_tags(self, root, name, tags):
+        row = self.connection.execute("SELECT id FROM shapes WHERE root = ? AND name = ?", (root, name)).fetchone()
+        if row is None:
+            return
+        self.connection.execute("DELETE FROM tags WHERE shape = ?", row)
+        self.connection.executemany("INSERT OR IGNORE INTO tags (shape, tag) VALUES (?, ?)",
+                                    [(row[0], tag) for tag in tags])
+
+    def set_tags(self, name, tags, root=None):
+        root = normpath(root) if root else self.paths[0]
+        with self.connection:
+            self._write_tags(root, name, tags)
+        return self
+
+    def remove_shape(self, name):
+        # remove the shape which wins the priority, return its root so the files can be deleted
+        row = self.find(name)
+        if row is None:
+            return
+        with self.connection:
+            self.connection.execute("DELETE FROM shapes WHERE id = ?", row[:1])
+        return row[1]
+
+    def rebuild_root(self, root, entries):
+        """
+        sync every shape of root in one transaction, shapes missing from entries are removed
+        entries is an iterable of (name, data, thumbnail, modified), author and tags are kept
+        """
+        root = normpath(root)
+        names = set()
+        with self.connection:
+            for name, data, thumbnail, modified in entries:
+                names.add(name)
+                self._write_shape(root, name, data, thumbnail, None, modified)
+            rows = self.connection.execute("SELECT id, name FROM shapes WHERE root = ?", (root,)).fetchall()
+            self.connection.executemany("DELETE FROM shapes WHERE id = ?",
+                                        [(shape_id,) for shape_id, name in rows if name not in names])
+        return self
+
+    def sync_folder(self, root):
+        """
+        bring root in line with its json/jpg folder, with one listdir and file stats
+        only added or changed files are read, shapes whose json was removed are deleted
+        files are normalized and checked like upload_control, invalid ones are dropped as batch index does
+        the newest json/jpg mtime is used as modified time, return (updated names, removed names, errors)
+        errors is {name: [problem, ...]} of the invalid files
+        """
+        root = normpath(root)
+        if not os.path.isdir(root):
+            return [], [], {}
+        file_names = set(os.listdir(root))
+        stamps = {}
+        for file_name in file_names:
+            name, ext = os.path.splitext(file_name)
+            if ext == ".json":
+                stamps[name] = get_stamp(root, name, name + ".jpg" in file_names)
+        indexed = dict(self.connection.execute("SELECT name, modified FROM shapes WHERE root = ?", (root,)))
+        changed = sorted(name for name, modified in stamps.items() if indexed.get(name) != modified)
+        removed = sorted(name for name in indexed if name not in stamps)
+
+        updated = []
+        errors = {}
+        # one transaction for the whole folder
+        with self.connection:
+            for name in changed:
+                data, errors[name] = read_shape(os.path.join(root, name + ".json"))
+                if errors[name]:
+                    # stale row of a file which became invalid is removed too
+                    if name in indexed:
+                        removed.append(name)
+                    continue
+                del errors[name]
+                # thumbnail is optional
+                thumbnail = None
+                if name + ".jpg" in file_names:
+                    with open(os.path.join(root, name + ".jpg"), "rb") as fp:
+                        thumbnail = fp.read()
+                self._write_shape(root, name, data, thumbnail, None, stamps[name])
+                updated.append(name)
+            self.connection.executemany("DELETE FROM shapes WHERE root = ? AND name = ?",
+                                        [(root, name) for name in removed])
+        return updated, sorted(removed), errors
+
+    def import_folder(self, root):
+        # one-shot import, a sync of a root which has no shape yet, return imported shape names
+        return self.sync_folder(root)[0]
+
+
+_catalog = None
+
+
+def get_catalog():
+    # shared catalog, every root is synced with its folder when the catalog is opened
+    global _catalog
+    if _catalog is None:
+        _catalog = Catalog()
+        for path in _catalog.paths:
+            for name, errors in sorted(_catalog.sync_folder(path)[2].items()):
+                print("skip invalid library shape {0}: {1}".format(os.path.join(path, name), "; ".join(errors)))
+    return _catalog
@@ -0,0 +1,95 @@
+"""
+Rule based coloring
+Curve shapes are scanned once, every rule is matched against the control short name
+and all overrides are written with one MDGModifier, run through the undoable command.
+"""
+from fnmatch import fnmatchcase
+
+from maya import cmds
+from maya.api.OpenMaya import *
+
+from . import undoable
+
+index_rgb_map = [[0.5, 0.5, 0.5], [0, 0, 0], [0.247, 0.247, 0.247], [0.498, 0.498, 0.498], [0.608, 0, 0.157],
+                 [0, 0.16, 0.376], [0, 0, 1], [0, 0.275, 0.094], [0.149, 0, 0.263], [0.78, 0, 0.78],
+                 [0.537, 0.278, 0.2], [0.243, 0.133, 0.121], [0.6, 0.145, 0], [1, 0, 0], [0, 1, 0],
+                 [0, 0.2549, 0.6], [1, 1, 1], [1, 1, 0], [0.388, 0.863, 1], [0.263, 1, 0.639], [1, 0.686, 0.686],
+                 [0.89, 0.674, 0.474], [1, 1, 0.388], [0, 0.6, 0.329], [0.627, 0.411, 0.188], [0.619, 0.627, 0.188],
+                 [0.408, 0.631, 0.188], [0.188, 0.631, 0.365], [0.188, 0.627, 0.627], [0.188, 0.403, 0.627],
+                 [0.434, 0.188, 0.627], [0.627, 0.188, 0.411]]
+
+
+# side suffix of library names, blue left, red right, yellow middle
+SIDE_RULES = [("*_L", 6), ("*_L_*", 6), ("*_R", 13), ("*_R_*", 13), ("*_M", 17), ("*_M_*", 17)]
+
+
+def nearest_indices(colors):
+    """
+    return the closest index_rgb_map index for every rgb in colors
+    index 0 means "use default color" in maya, so it is never returned
+    """
+    palette = list(enumerate(index_rgb_map))[1:]
+    return [min(palette, key=lambda item: (item[1][0] - r) ** 2 + (item[1][1] - g) ** 2 + (item[1][2] - b) ** 2)[0]
+            for r, g, b in colors]
+
+
+def nearest_index(rgb):
+    return nearest_indices([rgb])[0]
+
+
+def match(name, rules):
+    # value of the first rule which match name, rules are [(pattern, index or rgb), ...]
+    for pattern, value in rules:
+        if fnmatchcase(name, pattern):
+            return value
+
+
+def plan(rules=SIDE_RULES, roots=None):
+    """
+    return [(shape, index or rgb)] for every curve shape whose control matches a rule
+    """
+    if roots:
+        shapes = cmds.ls(roots, dag=1, l=1, ni=1, type="nurbsCurve") or []
+    else:
+        shapes = cmds.ls(l=1, ni=1, type="nurbsCurve") or []
+    entries = []
+    for shape in shapes:
+        # control short name without namespace
+        value = match(shape.split("|")[-2].split(":")[-1], rules)
+        if value is not None:
+            entries.append((shape, value))
+    return entries
+
+
+def apply(entries, rgb=False):
+    """
+    write overrides in one undoable modifier
+    rgb colors use overrideRGBColors when rgb is True, else they are mapped to the nearest index
+    """
+    if not rgb:
+        colors = [value for _, value in entries if not isinstance(value, int)]
+        indices = dict(zip(map(tuple, colors), nearest_indices(colors)))
+        entries = [(shape, value if isinstance(value, int) else indices[tuple(value)]) for shape, value in entries]
+
+    selection_list = MSelectionList()
+    for shape, _ in entries:
+        selection_list.add(shape)
+    modifier = MDGModifier()
+    for index, (_, value) in enumerate(entries):
+        node = MFnDependencyNode(selection_list.getDependNode(index))
+        modifier.newPlugValueBool(node.findPlug("overrideEnabled", False), True)
+        modifier.newPlugValueBool(node.findPlug("overrideRGBColors", False), not isinstance(value, int))
+        if isinstance(value, int):
+            modifier.newPlugValueInt(node.findPlug("overrideColor", False), value)
+        else:
+            for attr, channel in zip(("overrideColorR", "overrideColorG", "overrideColorB"), value):
+                modifier.newPlugValueFloat(node.findPlug(attr, False), channel)
+    return undoable.run(modifier)
+
+
+def auto_color(rules=SIDE_RULES, roots=None, rgb=False):
+    # color every control under roots, or in the scene, return colored shape count
+    entries = plan(rules, roots)
+    apply(entries, rgb)
+    return len(entries)
+
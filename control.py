@@ -1,9 +1,9 @@
-import json
-import os.path
-
 from maya import cmds
 from maya.api.OpenMaya import *
 
+from . import catalog
+from . import shapes
+
 def api_ls(*names):
     selection_list = MSelectionList()
     for name in names:
@@ -24,12 +24,15 @@ class Control(object):
     :param: -o -offset [float, float,float]         translation
     :param: -l -locked [str, ...]                   lock attribute
     :parma: -ou -outputs [str, str]                 output attribute
+    :param: -lw -line_width float                   line width
+    :param: -lb -library [str, str]                 library shape name and hash, [] to clear
     """
     def __init__(self, *args, **kwargs):
         self.uuid = None
         keys = [("t", "transform"), ("n", "name"), ("p", "parent"), ("s", "shape"),
                 ("c", "color"), ("r", "radius"), ("ro", "rotate"),
-                ("o", "offset"), ("l", "locked"), ("ou", "outputs")]
+                ("o", "offset"), ("l", "locked"), ("ou", "outputs"), ("lw", "line_width"),
+                ("lb", "library")]
 
         # try to get value from long, short, index words
         for index,(short, long) in enumerate(keys):
@@ -92,9 +95,20 @@ class Control(object):
     def get_color(self):
         # if overrideEnabled set to True, return color
         for shape in self.get_shapelist():
-            if cmds.setAttr(shape + ".overrideEnabled"):
+            if cmds.getAttr(shape + ".overrideEnabled"):
                 return cmds.getAttr(shape + ".overrideColor")
 
+    def set_line_width(self, line_width):
+        # set line width on every curve shape
+        for shape in self.get_shapelist():
+            cmds.setAttr(shape + ".lineWidth", line_width)
+        return self
+
+    def get_line_width(self):
+        # shapes share one line width, return the first one
+        for shape in self.get_shapelist():
+            return cmds.getAttr(shape + ".lineWidth")
+
     def get_shapelist(self):
         #get all shape node under transform node that type is nurbsCurve
         shapes = cmds.listRelatives(self.get_transform(), s=True, f=True) or []
@@ -105,16 +119,14 @@ class Control(object):
         if self.get_shapelist():
             cmds.delete(self.get_shapelist())
 
-        # if shape is string. read relative json file
+        # if shape is string. query shape data from library catalog
+        # stamp library name and content hash, so refresh can find outdated controls
         if not isinstance(shape, list):
-            data_file = os.path.abspath(__file__ + "/../data/{shape}.json".format(shape=shape))
-            if os.path.isfile(data_file):
-                with open(data_file, "r") as fp:
-                    shape = json.load(fp)
-            else:
-                shape=[]
+            name, shape = shape, catalog.get_catalog().get_shape(shape) or []
+            self.set_library([name, shapes.digest(shape)] if shape else [])
 
         # if shape is a list, means returned from get_shape
+        # library data is normalized and checked when the catalog reads it, so it is sent to cmds.curve as it is
         for data in shape:
             # turn points from one-dimensional list to float3 list
             points = data["points"]
@@ -136,6 +148,24 @@ class Control(object):
             cmds.rename(shape, self.get_name()+"Shape")
         return self
 
+    def set_library(self, library):
+        transform = self.get_transform()
+        for attr, value in zip(["libraryShape", "libraryHash"], library or [None, None]):
+            if value is None:
+                if cmds.attributeQuery(attr, n=transform, ex=1):
+                    cmds.deleteAttr(transform + "." + attr)
+                continue
+            if not cmds.attributeQuery(attr, n=transform, ex=1):
+                cmds.addAttr(transform, ln=attr, dt="string")
+            cmds.setAttr(transform + "." + attr, value, type="string")
+        return self
+
+    def get_library(self):
+        # return [name, hash] of the library shape used, or None
+        transform = self.get_transform()
+        if cmds.attributeQuery("libraryShape", n=transform, ex=1):
+            return [cmds.getAttr(transform + ".libraryShape"), cmds.getAttr(transform + ".libraryHash")]
+
     def get_shape(self):
         # get all shape node in for loop
         return [dict(
@@ -145,6 +175,14 @@ class Control(object):
             knot=list(MFnNurbsCurve(api_ls(shape).getDagPath(0)).knots()),  #curve knots
         ) for shape in self.get_shapelist()]
 
+    def simplify(self, tolerance):
+        # rebuild shape with fewer cvs, keep color, outputs and line width, return the deviation
+        # simplified shape is no longer the library one, the stamp is cleared so refresh leaves it alone
+        shape, error = shapes.simplify(self.get_shape(), tolerance)
+        Control(self.get_transform(), shape=shape, color=self.get_color(), outputs=self.get_outputs(),
+                line_width=self.get_line_width(), library=[])
+        return error
+
     def set_locked(self, locked):
         # if input s, transfer it to sx, sy, sz
         trs_xyz_map = {trs: [trs+xyz for xyz in "xyz"] for trs in "trs"}
@@ -0,0 +1,163 @@
+"""
+Push library shape updates into many rig files
+    python controlLib/propagate.py rigs/*.ma --shape IKLeg_R --jobs 4
+Every file is opened by its own mayapy process, a bounded thread pool waits on them.
+Workers are started as "<mayapy> -m <package>.propagate --worker <file> [--shape name ...]"
+and print one report line, so any executable following that contract can stand in for mayapy.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    from . import catalog
+except ImportError:
+    # run as a script, package folder is on sys.path
+    import catalog
+
+PACKAGE_PATH = os.path.abspath(__file__ + "/..")
+PACKAGE = os.path.basename(PACKAGE_PATH)
+REPORT_PREFIX = "propagate-report: "
+REPORT_KEYS = {"file", "ok", "controls"}
+
+
+def run_worker(path, names=None, executable=None, save=True, timeout=None):
+    """
+    update one file in a new mayapy process, return its report dict
+    """
+    executable = executable or os.environ.get("MAYAPY", "mayapy")
+    command = [executable, "-m", PACKAGE + ".propagate", "--worker", path]
+    for name in names or []:
+        command += ["--shape", name]
+    if not save:
+        command.append("--no-save")
+    # package parent folder must be importable in the worker
+    env = dict(os.environ)
+    paths = [os.path.dirname(PACKAGE_PATH), env.get("PYTHONPATH")]
+    env["PYTHONPATH"] = os.pathsep.join(path for path in paths if path)
+
+    start = time.time()
+    try:
+        process = subprocess.run(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 universal_newlines=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return dict(file=path, ok=False, controls=[], error=str(e), seconds=time.time() - start)
+
+    report = None
+    for line in process.stdout.splitlines():
+        if line.startswith(REPORT_PREFIX):
+            try:
+                report = json.loads(line[len(REPORT_PREFIX):])
+                if not isinstance(report, dict) or not REPORT_KEYS.issubset(report):
+                    raise ValueError("expect a dict with {0}".format(", ".join(sorted(REPORT_KEYS))))
+            except ValueError as e:
+                # a broken report fails this file only, not the whole run
+                report = dict(file=path, ok=False, controls=[], error="bad report line: {0}".format(e))
+    if report is None:
+        error = (process.stderr.strip().splitlines() or ["worker exit code {0}".format(process.returncode)])[-1]
+        report = dict(file=path, ok=False, controls=[], error=error)
+    report["seconds"] = time.time() - start
+    return report
+
+
+def propagate(files, names=None, jobs=4, executable=None, save=True, timeout=None):
+    """
+    run one worker per file, at most "jobs" at once, return reports in files order
+    names limit the update to these library shapes, default to every library shape
+    """
+    # make sure the catalog is indexed once before workers read it concurrently
+    catalog.get_catalog()
+    reports = {}
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(run_worker, path, names, executable, save, timeout): path for path in files}
+        for count, future in enumerate(as_completed(futures), 1):
+            report = future.result()
+            reports[futures[future]] = report
+            print("[{0}/{1}] {2:.1f}s {3} {4} ({5} controls)".format(
+                count, len(files), report["seconds"], "ok" if report["ok"] else "FAIL",
+                report["file"], len(report["controls"])))
+            if not report["ok"]:
+                print("    " + report.get("error", ""))
+    print("{0} files, {1} failed, {2:.1f}s wall time".format(
+        len(files), sum(not report["ok"] for report in reports.values()), time.time() - start))
+    return [reports[path] for path in files]
+
+
+def work(path, names=None, save=True):
+    """
+    worker side, run inside mayapy
+    controls stamped with an outdated library shape get the new shape,
+    unstamped controls named as one of "names" get it too
+    color, radius and outputs are kept like load_control
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    from maya import cmds
+    from . import shapes
+    from . import tools
+    from .control import Control
+
+    try:
+        cmds.file(path, o=1, f=1)
+        shape_catalog = catalog.get_catalog()
+        updated = []
+        for ctrl in tools.list_controls():
+            library = Control(ctrl).get_library()
+            # unstamped controls are matched by name only for shapes given explicitly,
+            # default names such as nurbsCircle1 would hit stray curves of every rig
+            if library:
+                shape = library[0]
+            elif names:
+                shape = Control(ctrl).get_name()
+            else:
+                continue
+            if names and catalog.base_name(shape) not in names:
+                continue
+            data = shape_catalog.get_shape(shape)
+            if data is None or (library and library[1] == shapes.digest(data)):
+                continue
+            kwargs = {key: getattr(Control(ctrl), "get_" + key)() for key in ("color", "outputs", "radius")}
+            Control(ctrl, shape=shape, **kwargs)
+            updated.append(ctrl)
+        if updated and save:
+            cmds.file(save=1, f=1)
+    finally:
+        maya.standalone.uninitialize()
+    return dict(file=path, ok=True, controls=updated)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="propagate library shapes into rig files")
+    parser.add_argument("files", nargs="+", help=".ma/.mb rig files")
+    parser.add_argument("--shape", action="append", help="library shape to update, default to all, "
+                        "unstamped controls named as this shape are updated too")
+    parser.add_argument("--jobs", type=int, default=4, help="mayapy process count")
+    parser.add_argument("--mayapy", help="mayapy executable, default to $MAYAPY or mayapy")
+    parser.add_argument("--timeout", type=float, help="seconds before a worker is killed")
+    parser.add_argument("--no-save", action="store_true", help="update files without saving them")
+    parser.add_argument("--report", help="write reports to this json file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        try:
+            report = work(args.files[0], args.shape, not args.no_save)
+        except Exception as e:
+            report = dict(file=args.files[0], ok=False, controls=[], error="{0}: {1}".format(type(e).__name__, e))
+        print(REPORT_PREFIX + json.dumps(report))
+        return 0 if report["ok"] else 1
+
+    reports = propagate(args.files, args.shape, args.jobs, args.mayapy, not args.no_save, args.timeout)
+    if args.report:
+        with open(args.report, "w") as fp:
+            json.dump(reports, fp, indent=4)
+    return 0 if all(report["ok"] for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
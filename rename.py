@@ -0,0 +1,78 @@
+"""
+Batch rename engine
+Nodes are resolved to handles before anything is renamed, new names are planned in memory,
+checked against the scene names and applied with one MDagModifier.
+Renaming a parent no longer breaks the path of the nodes after it.
+The modifier runs through the undoable command, so ctrl+z reverts the whole rename.
+"""
+from collections import Counter
+
+from maya import cmds
+from maya.api.OpenMaya import *
+
+from . import undoable
+
+# tokens: {name} old name, {index} padded number, {nodeType} node type, other tokens come from kwargs
+PATTERN = "{prefix}_{index}_{type}"
+
+
+def get_handles(nodes):
+    selection_list = MSelectionList()
+    for node in nodes:
+        selection_list.add(node)
+    return [MObjectHandle(selection_list.getDependNode(i)) for i in range(selection_list.length())]
+
+
+def plan(nodes, pattern=PATTERN, start=1, padding=0, **tokens):
+    """
+    return [(handle, old name, new name)] without touching the scene
+    """
+    entries = []
+    for index, handle in enumerate(get_handles(nodes)):
+        node = MFnDependencyNode(handle.object())
+        new = pattern.format(name=node.name(), index=str(start + index).zfill(padding),
+                             nodeType=node.typeName, **tokens)
+        entries.append((handle, node.name(), new))
+    return entries
+
+
+def find_clashes(entries):
+    # new names used twice in the plan or by a scene node which is not renamed
+    names = Counter(name.split("|")[-1] for name in cmds.ls())
+    names.subtract(old for _, old, _ in entries)
+    news = Counter(new for _, _, new in entries)
+    return sorted(new for new in news if news[new] > 1 or names[new] > 0)
+
+
+def apply(entries):
+    # rename in one undoable modifier, names swapped inside the plan go through a temp name first
+    modifier = MDagModifier()
+    olds = set(old for _, old, _ in entries)
+    moved = []
+    for index, (handle, old, new) in enumerate(entries):
+        if old == new:
+            continue
+        if new in olds:
+            modifier.renameNode(handle.object(), "renameTemp{0}".format(index))
+            moved.append((handle, new))
+        else:
+            modifier.renameNode(handle.object(), new)
+    for handle, new in moved:
+        modifier.renameNode(handle.object(), new)
+    return undoable.run(modifier)
+
+
+def rename(nodes, pattern=PATTERN, start=1, padding=0, preview=False, **tokens):
+    """
+    rename nodes from pattern, raise ValueError if any new name clashes
+    preview return [(old name, new name, clash)] and leave the scene untouched
+    """
+    entries = plan(nodes, pattern, start, padding, **tokens)
+    clashes = find_clashes(entries)
+    if preview:
+        return [(old, new, new in clashes) for _, old, new in entries]
+    if clashes:
+        raise ValueError("name clash: " + ", ".join(clashes))
+    apply(entries)
+    return [(old, new, False) for _, old, new in entries]
+
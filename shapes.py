@@ -0,0 +1,352 @@
+"""
+Shape data helpers which don't need maya
+Shape data is the list returned from Control.get_shape, every curve is a dict of
+points (flat float list), degree, knot (maya knots, cvs + degree - 1) and periodic.
+Periodic curves store unique cvs only, set_shape appends the first "degree" cvs.
+"""
+import hashlib
+import json
+import math
+
+KEYS = ("points", "degree", "knot", "periodic")
+TOLERANCE = 1e-6
+
+
+def read_shape(path):
+    with open(path, "r") as fp:
+        return json.load(fp)
+
+
+def write_shape(path, shape):
+    # same layout as upload_control
+    with open(path, "w") as fp:
+        json.dump(shape, fp, indent=4)
+
+
+def digest(shape):
+    # content hash of shape data, hashed after normalize so key order, int or float values
+    # and stored periodic wrap cvs give the same hash
+    text = json.dumps(normalize(shape), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def check(shape):
+    """
+    return a list of problems found in shape data, empty list means valid
+    data which pass the check can be sent to cmds.curve without any other test
+    """
+    if not isinstance(shape, list):
+        return ["shape data is not a list"]
+    errors = []
+    for index, data in enumerate(shape):
+        errors.extend("curve {0}: {1}".format(index, error) for error in check_curve(data))
+    return errors
+
+
+def check_curve(data):
+    if not isinstance(data, dict):
+        return ["not a dict"]
+    missing = [key for key in KEYS if key not in data]
+    if missing:
+        return ["missing " + ", ".join(missing)]
+    points, degree, knots = data["points"], data["degree"], data["knot"]
+    if not isinstance(degree, int) or degree < 1:
+        return ["degree must be a positive int"]
+    if len(points) % 3:
+        return ["point list length is not a multiple of 3"]
+
+    errors = []
+    # whole list tests run in builtins instead of python loops
+    if not all(map(math.isfinite, points)):
+        errors.append("points contain nan or inf")
+    if not all(map(math.isfinite, knots)):
+        errors.append("knots contain nan or inf")
+    if any(map(float.__gt__, map(float, knots), map(float, knots[1:]))):
+        errors.append("knots are not increasing")
+
+    count = len(points) // 3
+    if data["periodic"] and len(knots) == count + degree - 1 and has_wrap(points, degree):
+        errors.append("periodic wrap cvs are stored, normalize to strip them")
+    elif len(knots) != knot_count(count, degree, data["periodic"]):
+        errors.append("{0} knots for {1} cvs, expect {2}".format(
+            len(knots), count, knot_count(count, degree, data["periodic"])))
+    if count < degree + 1 and not data["periodic"]:
+        errors.append("{0} cvs is not enough for degree {1}".format(count, degree))
+    return errors
+
+
+def knot_count(count, degree, periodic):
+    # maya knot count, periodic curves get "degree" more cvs from the wrap
+    if periodic:
+        count += degree
+    return count + degree - 1
+
+
+def has_wrap(points, degree):
+    # last "degree" cvs repeat the first ones
+    size = degree * 3
+    if len(points) <= size:
+        return False
+    return all(abs(a - b) < TOLERANCE for a, b in zip(points[:size], points[-size:]))
+
+
+def normalize(shape, center=False, unit=False):
+    """
+    return clean shape data, strip stored periodic wrap cvs and cast values
+    center move the cvs bounding box center to origin
+    unit scale cvs so the farthest one is at radius 1, like Control.get_radius
+    """
+    result = []
+    for data in shape:
+        points = [float(v) for v in data["points"]]
+        degree = int(data["degree"])
+        knots = [float(v) for v in data["knot"]]
+        periodic = bool(data["periodic"])
+        if periodic and len(knots) == len(points) // 3 + degree - 1 and has_wrap(points, degree):
+            points = points[:-degree * 3]
+        result.append(dict(points=points, periodic=periodic, degree=degree, knot=knots))
+
+    points = sum([data["points"] for data in result], [])
+    if center and points:
+        offset = [(max(points[i::3]) + min(points[i::3])) / 2.0 for i in range(3)]
+        for data in result:
+            data["points"] = [v - offset[i % 3] for i, v in enumerate(data["points"])]
+    if unit and points:
+        points = sum([data["points"] for data in result], [])
+        radius = max(math.sqrt(x * x + y * y + z * z) for x, y, z in zip(points[0::3], points[1::3], points[2::3]))
+        if radius > TOLERANCE:
+            for data in result:
+                data["points"] = [v / radius for v in data["points"]]
+    return result
+
+
+def get_cvs(data):
+    # turn points from one-dimensional list to float3 list, wrap periodic cvs like set_shape
+    points = data["points"]
+    cvs = [points[i:i + 3] for i in range(0, len(points), 3)]
+    if data["periodic"]:
+        cvs = cvs + cvs[:data["degree"]]
+    return cvs
+
+
+def evaluate(data, samples=8):
+    """
+    evaluate curve to a polyline with de Boor algorithm, "samples" points per span
+    degree 1 curves return their cvs
+    """
+    cvs = get_cvs(data)
+    degree = data["degree"]
+    if degree == 1:
+        return cvs
+    # maya knots miss the first and last knot of the standard knot vector
+    knots = [data["knot"][0]] + list(data["knot"]) + [data["knot"][-1]]
+    polyline = []
+    for span in range(degree, len(cvs)):
+        start, end = knots[span], knots[span + 1]
+        if end <= start:
+            continue
+        for step in range(samples):
+            polyline.append(de_boor(cvs, knots, degree, span, start + (end - start) * step / float(samples)))
+    # close the last span
+    polyline.append(de_boor(cvs, knots, degree, len(cvs) - 1, knots[len(cvs)]))
+    return polyline
+
+
+def de_boor(cvs, knots, degree, span, t):
+    points = [list(cvs[span - degree + i]) for i in range(degree + 1)]
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            left, right = knots[span - degree + j], knots[span + 1 + j - r]
+            alpha = (t - left) / (right - left) if right > left else 0.0
+            points[j] = [(1.0 - alpha) * a + alpha * b for a, b in zip(points[j - 1], points[j])]
+    return points[degree]
+
+
+def simplify(shape, tolerance):
+    """
+    rebuild every curve with fewer cvs, the deviation from the original curve stays under tolerance
+    degree 1 curves drop cvs with Douglas-Peucker, higher degree curves are refitted by least squares
+    return (shape, error), error is the largest deviation of the simplified curves
+    """
+    result, error = [], 0.0
+    for data in shape:
+        if data["degree"] == 1:
+            curve, curve_error = simplify_linear(data, tolerance)
+        else:
+            curve, curve_error = refit(data, tolerance)
+        result.append(curve)
+        error = max(error, curve_error)
+    return result, error
+
+
+def distance(a, b):
+    return math.sqrt(sum((x - y) ** 2 for x, y in zip(a, b)))
+
+
+def segment_distance(point, start, end):
+    # distance from point to segment start-end
+    direction = [e - s for s, e in zip(start, end)]
+    length = sum(v * v for v in direction)
+    if length < TOLERANCE * TOLERANCE:
+        return distance(point, start)
+    t = sum((p - s) * d for p, s, d in zip(point, start, direction)) / length
+    t = min(max(t, 0.0), 1.0)
+    return distance(point, [s + d * t for s, d in zip(start, direction)])
+
+
+def douglas_peucker(points, tolerance):
+    # return kept indices and the largest distance of dropped points
+    keep = {0, len(points) - 1}
+    error = 0.0
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = [segment_distance(points[i], points[first], points[last]) for i in range(first + 1, last)]
+        farthest = max(distances)
+        index = first + 1 + distances.index(farthest)
+        if farthest > tolerance:
+            keep.add(index)
+            stack.extend([(first, index), (index, last)])
+        else:
+            error = max(error, farthest)
+    return sorted(keep), error
+
+
+def simplify_linear(data, tolerance):
+    # periodic polyline is closed by its first point, the closing point is dropped again after
+    cvs = get_cvs(data)
+    indices, error = douglas_peucker(cvs, tolerance)
+    cvs = [cvs[i] for i in indices]
+    if data["periodic"]:
+        cvs = cvs[:-1]
+    if len(cvs) < (3 if data["periodic"] else 2) or len(cvs) * 3 >= len(data["points"]):
+        return dict(data), 0.0
+    knots = [float(i) for i in range(len(cvs) + 1 if data["periodic"] else len(cvs))]
+    return dict(points=sum(cvs, []), periodic=data["periodic"], degree=1, knot=knots), error
+
+
+def refit(data, tolerance, samples=16):
+    # sample the original curve, then fit curves with more and more cvs until one is close enough
+    degree, periodic = data["degree"], data["periodic"]
+    polyline = evaluate(data, samples)
+    if periodic:
+        polyline = polyline[:-1]
+
+    # chord length parameters in [0, 1), closing segment counts for periodic curves
+    lengths = [0.0]
+    for a, b in zip(polyline, polyline[1:] + polyline[:1] if periodic else polyline[1:]):
+        lengths.append(lengths[-1] + distance(a, b))
+    total = lengths[-1] or 1.0
+    params = [length / total for length in lengths[:len(polyline)]]
+
+    # error falls as cvs are added, double the count until one fits, then binary search below it
+    low, high = degree + 1, len(data["points"]) // 3 - 1
+    best = None
+    count = low
+    while low <= high:
+        curve = fit(polyline, params, count, degree, periodic)
+        if curve is not None and curve[1] <= tolerance:
+            best, high = curve, count - 1
+        else:
+            low = count + 1
+        count = (low + high) // 2 if best else min(count * 2, high)
+    return best or (dict(data), 0.0)
+
+
+def fit(polyline, params, count, degree, periodic):
+    """
+    least squares fit of polyline with "count" cvs on uniform knots
+    return (curve data, largest distance to polyline) or None if the system is singular
+    """
+    spans = count if periodic else count - degree
+    if periodic:
+        knots = [float(i) for i in range(1 - degree, count + degree)]
+    else:
+        knots = [0.0] * degree + [float(i) for i in range(1, spans)] + [float(spans)] * degree
+    standard = [knots[0] - 1.0] + knots + [knots[-1] + 1.0] if periodic else [knots[0]] + knots + [knots[-1]]
+
+    # basis rows, periodic cvs after "count" wrap to the first ones
+    rows = []
+    for u in params:
+        span, values = basis(standard, degree, u * spans)
+        rows.append([((span - degree + k) % count, value) for k, value in enumerate(values)])
+
+    # normal equations A^T A x = A^T p, matrix rows are sparse dicts, only degree + 1 basis are nonzero
+    matrix = [{} for _ in range(count)]
+    vector = [[0.0] * 3 for _ in range(count)]
+    for row, point in zip(rows, polyline):
+        for i, a in row:
+            for j, b in row:
+                matrix[i][j] = matrix[i].get(j, 0.0) + a * b
+            for axis in range(3):
+                vector[i][axis] += a * point[axis]
+    cvs = solve(matrix, vector)
+    if cvs is None:
+        return
+
+    error = 0.0
+    for row, point in zip(rows, polyline):
+        fitted = [sum(value * cvs[i][axis] for i, value in row) for axis in range(3)]
+        error = max(error, distance(fitted, point))
+    return dict(points=sum(cvs, []), periodic=periodic, degree=degree, knot=knots), error
+
+
+def basis(knots, degree, t):
+    # nonzero basis functions at t, return span and values for cvs span - degree ... span
+    last = len(knots) - degree - 2
+    span = degree
+    while span < last and knots[span + 1] <= t:
+        span += 1
+    values = [1.0] + [0.0] * degree
+    left, right = [0.0] * (degree + 1), [0.0] * (degree + 1)
+    for j in range(1, degree + 1):
+        left[j] = t - knots[span + 1 - j]
+        right[j] = knots[span + j] - t
+        saved = 0.0
+        for r in range(j):
+            temp = values[r] / (right[r + 1] + left[j - r])
+            values[r] = saved + right[r + 1] * temp
+            saved = left[j - r] * temp
+        values[j] = saved
+    return span, values
+
+
+def solve(matrix, vector):
+    """
+    solve symmetric positive definite normal equations, vector has one column per axis
+    matrix rows are {column: value}, return None if the system is singular
+    envelope cholesky, every row is factorized from its first nonzero column only,
+    so banded and periodic (banded with wrap corners) systems cost O(n * degree^2) instead of O(n^3)
+    """
+    size = len(matrix)
+    first = [min([j for j in row if j <= i] or [i]) for i, row in enumerate(matrix)]
+    lower = []
+    for i in range(size):
+        row = [0.0] * (i - first[i] + 1)
+        for j in range(first[i], i + 1):
+            value = matrix[i].get(j, 0.0)
+            other = lower[j] if j < i else row
+            value -= sum(row[k - first[i]] * other[k - first[j]] for k in range(max(first[i], first[j]), j))
+            if j < i:
+                row[j - first[i]] = value / lower[j][-1]
+            elif value < 1e-12:
+                return
+            else:
+                row[-1] = math.sqrt(value)
+        lower.append(row)
+
+    # forward L y = b, then backward L^T x = y column by column
+    result = [values[:] for values in vector]
+    for i in range(size):
+        for axis in range(3):
+            value = result[i][axis] - sum(lower[i][k - first[i]] * result[k][axis] for k in range(first[i], i))
+            result[i][axis] = value / lower[i][-1]
+    for i in range(size - 1, -1, -1):
+        for axis in range(3):
+            result[i][axis] /= lower[i][-1]
+        for k in range(first[i], i):
+            for axis in range(3):
+                result[k][axis] -= lower[i][k - first[i]] * result[i][axis]
+    return result
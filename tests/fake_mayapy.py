@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Stand-in for mayapy following the propagate worker contract
+    fake_mayapy.py -m <package>.propagate --worker <file> [--shape name ...] [--no-save]
+The rig file is json instead of a maya scene:
+    controls    library shape names of the controls found in the scene
+    sleep       seconds to wait before reporting
+    stdout      raw text printed instead of the report line
+    stderr      text printed to stderr before exiting with code 1
+"""
+import argparse
+import json
+import sys
+import time
+
+REPORT_PREFIX = "propagate-report: "
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", dest="module")
+    parser.add_argument("--worker", required=True)
+    parser.add_argument("--shape", action="append")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(args.worker, "r") as fp:
+        scene = json.load(fp)
+    time.sleep(scene.get("sleep", 0))
+    if "stderr" in scene:
+        sys.stderr.write(scene["stderr"] + "\n")
+        return 1
+    if "stdout" in scene:
+        print(scene["stdout"])
+        return 0
+    controls = [name for name in scene.get("controls", []) if not args.shape or name in args.shape]
+    print(REPORT_PREFIX + json.dumps(dict(file=args.worker, ok=True, controls=controls, saved=not args.no_save)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
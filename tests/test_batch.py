@@ -0,0 +1,58 @@
+"""
+batch tasks on copies of the bundled data shapes
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_PATH))
+
+import batch
+import catalog
+import shapes
+
+
+class LodTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.root = os.path.join(self.path, "data")
+        shutil.copytree(catalog.DATA_PATH, self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def lod_file(self, name, **options):
+        return batch.lod_file(os.path.join(self.root, name + ".json"), **options)
+
+    def test_lod_written(self):
+        errors, note = self.lod_file("RootX_M", tolerance=0.2, level=2)
+        self.assertEqual(errors, [])
+        self.assertEqual(note, "cvs [40] -> [24], error 0.1504")
+        shape = shapes.read_shape(os.path.join(self.root, "RootX_M.lod2.json"))
+        self.assertEqual(shapes.check(shape), [])
+        self.assertEqual(len(shape[0]["points"]) // 3, 24)
+
+    def test_unchanged_shape_is_not_copied(self):
+        for name in ("AimEye_M", "IKLeg_R", "cube"):
+            errors, note = self.lod_file(name, tolerance=0.2)
+            self.assertEqual(errors, [])
+            self.assertTrue(note.endswith("unchanged, no lod written"), note)
+            self.assertFalse(os.path.exists(os.path.join(self.root, name + ".lod1.json")))
+
+    def test_level_zero_is_rejected(self):
+        errors, note = self.lod_file("RootX_M", level=0)
+        self.assertEqual(errors, ["lod level must be 1 or more, got 0"])
+        self.assertEqual(shapes.read_shape(os.path.join(self.root, "RootX_M.json")),
+                         shapes.read_shape(os.path.join(catalog.DATA_PATH, "RootX_M.json")))
+
+    def test_lod_of_lod_is_skipped(self):
+        self.lod_file("RootX_M", tolerance=0.2)
+        self.assertEqual(self.lod_file("RootX_M.lod1", tolerance=0.2), ([], None))
+
+
+if __name__ == "__main__":
+    unittest.main()
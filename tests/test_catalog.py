@@ -0,0 +1,143 @@
+"""
+catalog merging and folder sync against copies of the bundled data shapes
+    python -m unittest discover -s tests
+"""
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_PATH))
+
+import catalog
+import shapes
+
+DATA_NAMES = sorted(os.path.splitext(os.path.basename(path))[0]
+                    for path in glob.glob(os.path.join(catalog.DATA_PATH, "*.json")))
+
+
+def read_data(name):
+    return shapes.read_shape(os.path.join(catalog.DATA_PATH, name + ".json"))
+
+
+def touch(path):
+    # move mtime forward, file systems with coarse mtime would hide the change
+    stamp = os.path.getmtime(path) + 10
+    os.utime(path, (stamp, stamp))
+
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        # studio root overrides the package copy
+        self.studio = os.path.join(self.path, "studio")
+        self.package = os.path.join(self.path, "package")
+        os.makedirs(self.studio)
+        shutil.copytree(catalog.DATA_PATH, self.package)
+        self.catalog = catalog.Catalog(":memory:", [self.studio, self.package])
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.path)
+
+    def write(self, root, name, shape):
+        shapes.write_shape(os.path.join(root, name + ".json"), shape)
+
+    def test_sync_imports_folder_once(self):
+        updated, removed, errors = self.catalog.sync_folder(self.package)
+        self.assertEqual(updated, DATA_NAMES)
+        self.assertEqual((removed, errors), ([], {}))
+        self.assertEqual(self.catalog.names(), DATA_NAMES)
+        self.assertEqual(self.catalog.get_shape("cube"), shapes.normalize(read_data("cube")))
+        self.assertIsNotNone(self.catalog.get_thumbnail("cube"))
+        # nothing changed on disk, nothing is read again
+        self.assertEqual(self.catalog.sync_folder(self.package), ([], [], {}))
+
+    def test_sync_changed_added_removed(self):
+        self.catalog.sync_folder(self.package)
+        shape = shapes.normalize(read_data("cube"), unit=True)
+        self.write(self.package, "cube", shape)
+        touch(os.path.join(self.package, "cube.json"))
+        self.write(self.package, "NewShape_L", read_data("AimEye_M"))
+        os.remove(os.path.join(self.package, "IKLeg_R.json"))
+
+        self.assertEqual(self.catalog.sync_folder(self.package), (["NewShape_L", "cube"], ["IKLeg_R"], {}))
+        self.assertEqual(self.catalog.get_shape("cube"), shape)
+        self.assertIsNone(self.catalog.find("IKLeg_R"))
+        self.assertIn("NewShape_L", self.catalog.names())
+
+    def test_sync_skips_invalid_files(self):
+        self.catalog.sync_folder(self.package)
+        shape = read_data("FKScapula_L")
+        shape[0]["knot"] = shape[0]["knot"][:-1]
+        self.write(self.package, "FKScapula_L", shape)
+        touch(os.path.join(self.package, "FKScapula_L.json"))
+        with open(os.path.join(self.package, "Broken_M.json"), "w") as fp:
+            fp.write("[{\"points\": [")
+
+        updated, removed, errors = self.catalog.sync_folder(self.package)
+        self.assertEqual((updated, removed), ([], ["FKScapula_L"]))
+        self.assertEqual(sorted(errors), ["Broken_M", "FKScapula_L"])
+        self.assertEqual(errors["FKScapula_L"], ["curve 0: 22 knots for 21 cvs, expect 23"])
+        self.assertNotIn("FKScapula_L", self.catalog.names())
+        self.assertNotIn("Broken_M", self.catalog.names())
+
+    def test_sync_strips_stored_wrap(self):
+        shape = read_data("nurbsCircle1")
+        wrapped = [dict(shape[0], points=shape[0]["points"] + shape[0]["points"][:9])]
+        self.write(self.package, "nurbsCircle1", wrapped)
+        self.catalog.sync_folder(self.package)
+        self.assertEqual(self.catalog.get_shape("nurbsCircle1"), shapes.normalize(shape))
+
+    def test_priority_override_and_removal(self):
+        self.catalog.sync_folder(self.package)
+        shape = shapes.normalize(read_data("cube"), unit=True)
+        self.write(self.studio, "cube", shape)
+        self.catalog.sync_folder(self.studio)
+
+        self.assertEqual(self.catalog.names(), DATA_NAMES)
+        self.assertEqual(self.catalog.find("cube")[1], catalog.normpath(self.studio))
+        self.assertEqual(self.catalog.get_shape("cube"), shape)
+        self.assertIn(("cube", catalog.normpath(self.studio)), [stamp[:2] for stamp in self.catalog.stamps()])
+
+        # removing the override shows the package shape again
+        os.remove(os.path.join(self.studio, "cube.json"))
+        self.assertEqual(self.catalog.sync_folder(self.studio), ([], ["cube"], {}))
+        self.assertEqual(self.catalog.find("cube")[1], catalog.normpath(self.package))
+        self.assertEqual(self.catalog.get_shape("cube"), shapes.normalize(read_data("cube")))
+
+    def test_search_path_order(self):
+        self.catalog.sync_folder(self.package)
+        self.write(self.studio, "cube", shapes.normalize(read_data("cube"), unit=True))
+        self.catalog.sync_folder(self.studio)
+        self.catalog.set_search_paths([self.package, self.studio])
+        self.assertEqual(self.catalog.find("cube")[1], catalog.normpath(self.package))
+        # disabled roots are kept in the database but hidden
+        self.catalog.set_search_paths([self.studio])
+        self.assertEqual(self.catalog.names(), ["cube"])
+
+    def test_lod_variants_are_hidden(self):
+        self.catalog.sync_folder(self.package)
+        self.catalog.add_shape(catalog.lod_name("RootX_M", 1), read_data("AimEye_M"), root=self.package)
+        self.assertEqual(self.catalog.names(), DATA_NAMES)
+        self.assertIsNotNone(self.catalog.find("RootX_M.lod1"))
+
+    def test_rebuild_root_keeps_author_and_tags(self):
+        self.catalog.add_shape("cube", read_data("cube"), tags=["box"], author="rigger", root=self.package)
+        self.catalog.add_shape("AimEye_M", read_data("AimEye_M"), author="rigger", root=self.package)
+        shape = shapes.normalize(read_data("cube"), unit=True)
+        self.catalog.rebuild_root(self.package, [("cube", shape, None, time.time())])
+
+        info = self.catalog.get_info("cube")
+        self.assertEqual((info["author"], info["tags"]), ("rigger", ["box"]))
+        self.assertEqual(self.catalog.get_shape("cube"), shape)
+        self.assertEqual(self.catalog.names(), ["cube"])
+        self.assertEqual(self.catalog.names(tag="box"), ["cube"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+propagate runs against fake_mayapy.py, so no maya is needed
+    python -m unittest discover -s tests
+The package __init__ imports maya, modules are imported from the package folder like the batch scripts do.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_PATH))
+
+import catalog
+import propagate
+
+FAKE_MAYAPY = os.path.join(TESTS_PATH, "fake_mayapy.py")
+
+
+class PropagateTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        # keep the user catalog untouched
+        self.catalog = catalog._catalog
+        catalog._catalog = catalog.Catalog(":memory:", [self.path])
+
+    def tearDown(self):
+        catalog._catalog.close()
+        catalog._catalog = self.catalog
+        shutil.rmtree(self.path)
+
+    def write_scene(self, name, **scene):
+        path = os.path.join(self.path, name + ".ma")
+        with open(path, "w") as fp:
+            json.dump(scene, fp)
+        return path
+
+    def test_reports_in_files_order(self):
+        files = [self.write_scene("slow", sleep=0.3, controls=["IKLeg_R"]),
+                 self.write_scene("fast", controls=["IKLeg_R", "RootX_M"])]
+        reports = propagate.propagate(files, jobs=2, executable=FAKE_MAYAPY)
+        self.assertEqual([report["file"] for report in reports], files)
+        self.assertEqual([report["controls"] for report in reports], [["IKLeg_R"], ["IKLeg_R", "RootX_M"]])
+        self.assertTrue(all(report["ok"] and report["saved"] for report in reports))
+
+    def test_worker_arguments(self):
+        path = self.write_scene("rig", controls=["IKLeg_R", "RootX_M"])
+        report, = propagate.propagate([path], names=["RootX_M"], executable=FAKE_MAYAPY, save=False)
+        self.assertEqual(report["controls"], ["RootX_M"])
+        self.assertFalse(report["saved"])
+
+    def test_failed_workers_do_not_stop_the_run(self):
+        files = [self.write_scene("crash", stderr="RuntimeError: scene is corrupt"),
+                 self.write_scene("garbage", stdout=propagate.REPORT_PREFIX + "{not json"),
+                 self.write_scene("list", stdout=propagate.REPORT_PREFIX + "[]"),
+                 self.write_scene("silent", stdout="nothing to report"),
+                 self.write_scene("rig", controls=["RootX_M"])]
+        reports = propagate.propagate(files, jobs=3, executable=FAKE_MAYAPY)
+        self.assertEqual([report["ok"] for report in reports], [False, False, False, False, True])
+        self.assertEqual(reports[0]["error"], "RuntimeError: scene is corrupt")
+        self.assertTrue(reports[1]["error"].startswith("bad report line"))
+        self.assertTrue(reports[2]["error"].startswith("bad report line"))
+        self.assertEqual(reports[3]["error"], "worker exit code 0")
+
+    def test_timeout(self):
+        path = self.write_scene("hang", sleep=5)
+        report, = propagate.propagate([path], executable=FAKE_MAYAPY, timeout=0.5)
+        self.assertFalse(report["ok"])
+        self.assertIn("timed out", report["error"])
+
+    def test_missing_executable(self):
+        path = self.write_scene("rig")
+        report, = propagate.propagate([path], executable=os.path.join(self.path, "no_mayapy"))
+        self.assertFalse(report["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+"""
+shapes checks, cleanup and simplification against the bundled data shapes
+    python -m unittest discover -s tests
+"""
+import copy
+import glob
+import math
+import os
+import sys
+import unittest
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_PATH))
+
+import catalog
+import shapes
+
+DATA_FILES = sorted(glob.glob(os.path.join(catalog.DATA_PATH, "*.json")))
+
+
+def read_data(name):
+    return shapes.read_shape(os.path.join(catalog.DATA_PATH, name + ".json"))
+
+
+def add_wrap(shape):
+    # store the periodic wrap cvs like a raw maya curve does, knots keep the same count
+    # shape must be periodic
+    shape = copy.deepcopy(shape)
+    for data in shape:
+        data["points"] = data["points"] + data["points"][:data["degree"] * 3]
+    return shape
+
+
+def deviation(data, simple, samples=32):
+    # largest distance from the dense original curve to the dense simplified polyline
+    polyline = shapes.evaluate(simple, samples)
+    if simple["periodic"]:
+        polyline = polyline + polyline[:1]
+    return max(min(shapes.segment_distance(point, a, b) for a, b in zip(polyline, polyline[1:]))
+               for point in shapes.evaluate(data, samples))
+
+
+def noisy_circle(count, noise=0.01):
+    # dense periodic curve which can't be fitted with fewer cvs at small tolerance
+    points = []
+    for i in range(count):
+        angle = 2 * math.pi * i / count
+        offset = noise * (1 if i % 2 else -1)
+        points += [math.cos(angle) + offset, 0.0, math.sin(angle) - offset]
+    return dict(points=points, degree=3, knot=[float(i) for i in range(-2, count + 3)], periodic=True)
+
+
+class CheckTest(unittest.TestCase):
+    def test_bundled_shapes_are_valid(self):
+        self.assertTrue(DATA_FILES)
+        for path in DATA_FILES:
+            self.assertEqual(shapes.check(shapes.read_shape(path)), [], path)
+
+    def test_knot_count(self):
+        shape = read_data("FKScapula_L")
+        shape[0]["knot"] = shape[0]["knot"][:-1]
+        self.assertEqual(shapes.check(shape), ["curve 0: 22 knots for 21 cvs, expect 23"])
+
+    def test_periodic_knot_count(self):
+        shape = read_data("nurbsCircle1")
+        shape[0]["knot"].append(shape[0]["knot"][-1] + 1.0)
+        self.assertEqual(shapes.check(shape), ["curve 0: 14 knots for 8 cvs, expect 13"])
+
+    def test_nan(self):
+        shape = read_data("cube")
+        shape[0]["points"][4] = float("nan")
+        shape[0]["knot"][2] = float("inf")
+        errors = shapes.check(shape)
+        self.assertIn("curve 0: points contain nan or inf", errors)
+        self.assertIn("curve 0: knots contain nan or inf", errors)
+
+    def test_decreasing_knots(self):
+        shape = read_data("RollToes_L")
+        shape[0]["knot"][5], shape[0]["knot"][6] = shape[0]["knot"][6], shape[0]["knot"][5] - 1.0
+        self.assertIn("curve 0: knots are not increasing", shapes.check(shape))
+
+    def test_malformed(self):
+        self.assertEqual(shapes.check({}), ["shape data is not a list"])
+        self.assertEqual(shapes.check([{"points": []}]), ["curve 0: missing degree, knot, periodic"])
+        shape = read_data("AimEye_M")
+        shape[0]["points"].pop()
+        self.assertEqual(shapes.check(shape), ["curve 0: point list length is not a multiple of 3"])
+
+    def test_stored_wrap_is_reported(self):
+        shape = add_wrap(read_data("HipSwinger_M"))
+        self.assertEqual(shapes.check(shape), ["curve 0: periodic wrap cvs are stored, normalize to strip them"])
+
+
+class NormalizeTest(unittest.TestCase):
+    def test_wrap_is_stripped(self):
+        for name in ("HipSwinger_M", "nurbsCircle1", "FKIKSpine_M"):
+            shape = read_data(name)
+            self.assertEqual(shapes.normalize(add_wrap(shape)), shapes.normalize(shape), name)
+
+    def test_bundled_shapes_stay_valid(self):
+        for path in DATA_FILES:
+            shape = shapes.read_shape(path)
+            for options in ({}, dict(center=True), dict(center=True, unit=True)):
+                self.assertEqual(shapes.check(shapes.normalize(shape, **options)), [], path)
+
+    def test_values_are_cast(self):
+        shape = shapes.normalize([dict(points=[0, 0, 0, 1, 0, 0], degree=1.0, knot=[0, 1], periodic=0)])
+        self.assertEqual(shape, [dict(points=[0.0, 0.0, 0.0, 1.0, 0.0, 0.0], degree=1, knot=[0.0, 1.0],
+                                      periodic=False)])
+        self.assertIsInstance(shape[0]["degree"], int)
+
+    def test_center_and_unit(self):
+        shape = shapes.normalize(read_data("RootX_M"), center=True, unit=True)
+        points = shape[0]["points"]
+        for axis in range(3):
+            self.assertAlmostEqual(max(points[axis::3]) + min(points[axis::3]), 0.0)
+        radius = max(shapes.distance(points[i:i + 3], [0.0, 0.0, 0.0]) for i in range(0, len(points), 3))
+        self.assertAlmostEqual(radius, 1.0)
+
+
+
+class SimplifyTest(unittest.TestCase):
+    def test_error_stays_within_tolerance(self):
+        for path in DATA_FILES:
+            shape = shapes.read_shape(path)
+            for tolerance in (0.05, 0.2):
+                simple, error = shapes.simplify(shape, tolerance)
+                self.assertEqual(shapes.check(simple), [], path)
+                self.assertLessEqual(error, tolerance, path)
+                for data, curve in zip(shape, simple):
+                    self.assertEqual((curve["degree"], curve["periodic"]), (data["degree"], data["periodic"]))
+                    self.assertLessEqual(len(curve["points"]), len(data["points"]), path)
+                    self.assertLessEqual(deviation(data, curve), tolerance, path)
+
+    def test_heavy_shapes_get_lighter(self):
+        for name, tolerance in (("RootX_M", 0.2), ("FKScapula_L", 0.2), ("RollToes_L", 0.2)):
+            shape = read_data(name)
+            simple, error = shapes.simplify(shape, tolerance)
+            self.assertLess(len(simple[0]["points"]), len(shape[0]["points"]), name)
+
+    def test_linear_keeps_corners(self):
+        # cube corners are far from every chord, nothing can be dropped
+        shape = read_data("cube")
+        self.assertEqual(shapes.simplify(shape, 0.2), (shape, 0.0))
+
+    def test_refit_smooth_curve(self):
+        shape = read_data("nurbsCircle1")
+        curve, error = shapes.refit(shape[0], 0.05)
+        self.assertLessEqual(error, 0.05)
+        self.assertEqual(shapes.check([curve]), [])
+
+    def test_refit_gives_up_on_noise(self):
+        # no fit is close enough, the original curve comes back with zero error
+        data = noisy_circle(64)
+        self.assertEqual(shapes.refit(data, 0.001), (data, 0.0))
+
+    def test_refit_dense_curve(self):
+        data = noisy_circle(160, noise=0.0)
+        curve, error = shapes.refit(data, 0.001)
+        self.assertLessEqual(error, 0.001)
+        self.assertLess(len(curve["points"]) // 3, 20)
+
+    def test_solve_matches_dense_system(self):
+        # periodic normal equations, wrap corners included
+        size = 9
+        matrix = [{} for _ in range(size)]
+        for i in range(size):
+            for offset in (-1, 0, 1):
+                matrix[i][(i + offset) % size] = 4.0 if offset == 0 else 1.0
+        vector = [[float(i), 1.0, -float(i)] for i in range(size)]
+        result = shapes.solve(matrix, vector)
+        for i in range(size):
+            for axis in range(3):
+                value = sum(matrix[i].get(j, 0.0) * result[j][axis] for j in range(size))
+                self.assertAlmostEqual(value, vector[i][axis])
+
+    def test_solve_singular(self):
+        self.assertIsNone(shapes.solve([{0: 1.0, 1: 1.0}, {0: 1.0, 1: 1.0}], [[1.0] * 3, [2.0] * 3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
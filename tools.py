@@ -1,6 +1,10 @@
 from maya import cmds
 from .control import Control
+from . import catalog
+from . import coloring
 from . import constraints
+from . import rename
+from . import shapes
 import os
 import json
 
@@ -17,12 +21,13 @@ def undo(fun):
         cmds.undoInfo(openChunk=1)
         # save current selected object
         long_name = cmds.ls(sl=1, l=1)
-        # call input function
-        fun(*args, **kwargs)
-        # keep selection
-        cmds.select(cmds.ls(long_name))
-        # close undo record
-        cmds.undoInfo(closeChunk=1)
+        try:
+            # call input function
+            return fun(*args, **kwargs)
+        finally:
+            # keep selection and close undo record, even if the function raised
+            cmds.select(cmds.ls(long_name))
+            cmds.undoInfo(closeChunk=1)
 
     return undo_fun
 
@@ -44,16 +49,48 @@ def set_color(color):
     set_selected_controls(color=color)
 
 
+@undo
+def auto_color(rules=coloring.SIDE_RULES, rgb=False):
+    # color controls under selection, or the whole rig, from name rules
+    return coloring.auto_color(rules, cmds.ls(sl=1, l=1), rgb)
+
+
 @undo
 def load_control(shape):
     cmds.ls(sl=1, l=1, type=["joint", "transform"]) or cmds.group(em=1, n=shape)
     set_selected_controls("color", "outputs", "radius", shape=shape)
 
 
+@undo
+def refresh_controls():
+    """
+    re-apply library shapes to controls whose stamped hash is outdated, like load_control
+    return refreshed controls
+    """
+    shape_catalog = catalog.get_catalog()
+    # one scan for every stamped control, library hash computed once per shape
+    hashes = {}
+    controls = []
+    for ctrl in cmds.ls("*.libraryShape", r=1, o=1, l=1) or []:
+        name, digest = Control(ctrl).get_library()
+        if name not in hashes:
+            shape = shape_catalog.get_shape(name)
+            hashes[name] = shapes.digest(shape) if shape else None
+        if hashes[name] is None or hashes[name] == digest:
+            continue
+        kwargs = {key: getattr(Control(ctrl), "get_" + key)() for key in ("color", "outputs", "radius")}
+        Control(ctrl, shape=name, **kwargs)
+        controls.append(ctrl)
+    if controls:
+        cmds.dgdirty(controls)
+    return controls
+
+
 @undo
 def upload_control():
-    # get controller data path
-    data_path = os.path.abspath(__file__ + "/../data")
+    # get controller data path, upload to the highest priority library root
+    shape_catalog = catalog.get_catalog()
+    data_path = shape_catalog.paths[0]
     # if path nonexistence，create path
     if not os.path.isdir(data_path):
         os.makedirs(data_path)
@@ -62,9 +99,15 @@ def upload_control():
         ctrl = Control(ctrl)
         # get controller jason path from name
         data_file = os.path.join(data_path, ctrl.get_name()+".json")
+        # clean shape data, invalid data never reach the library
+        data = shapes.normalize(ctrl.get_shape())
+        errors = shapes.check(data)
+        if errors:
+            cmds.warning("skip upload of {0}: {1}".format(ctrl.get_name(), "; ".join(errors)))
+            continue
         # write shape data to json file
         with open(data_file, "w") as fp:
-            json.dump(ctrl.get_shape(), fp, indent=4)
+            json.dump(data, fp, indent=4)
 
         # hide viewport display
         for hud in cmds.headsUpDisplay(lh=1):
@@ -108,6 +151,17 @@ def upload_control():
                 os.remove(dst_path)
             os.rename(src_path, dst_path)
 
+        # index shape and thumbnail in catalog
+        thumbnail = None
+        if os.path.isfile(dst_path):
+            with open(dst_path, "rb") as fp:
+                thumbnail = fp.read()
+        # file stamp as modified time, so the next folder sync sees the shape unchanged
+        shape_catalog.add_shape(ctrl.get_name(), data, thumbnail=thumbnail, root=data_path,
+                                modified=catalog.get_stamp(data_path, ctrl.get_name()))
+        # uploaded control now uses the library shape
+        ctrl.set_library([ctrl.get_name(), shapes.digest(data)])
+
         # if screenshot viewport exist, delete it
         if cmds.modelPanel(panel, ex=1):
             cmds.deleteUI(panel, panel=True)
@@ -118,14 +172,15 @@ def upload_control():
 @undo
 def delete_controls(shapes):
     for s in shapes:
-        # check json file existence and delete
-        path = os.path.abspath(__file__ + "/../data/{s}.json".format(s=s))
-        if os.path.isfile(path):
-            os.remove(path)
-        # check relative jpg file existence and delete
-        path = os.path.abspath(__file__ + "/../data/{s}.jpg".format(s=s))
-        if os.path.isfile(path):
-            os.remove(path)
+        # remove from catalog, get the library root the shape belonged to
+        root = catalog.get_catalog().remove_shape(s)
+        if root is None:
+            continue
+        # check json and relative jpg file existence and delete
+        for ext in (".json", ".jpg"):
+            path = os.path.join(root, s + ext)
+            if os.path.isfile(path):
+                os.remove(path)
 
 
 @undo
@@ -156,7 +211,9 @@ def mirror_control():
 def replace_control():
     controls = cmds.ls(sl=1, l=1, type=["joint", "transform"])
     if controls:
-        set_selected_controls("color", "outputs", shape=Control(controls[-1]).get_shape())
+        src = Control(controls[-1])
+        # library stamp follows the shape
+        set_selected_controls("color", "outputs", shape=src.get_shape(), library=src.get_library() or [])
 
 
 @undo
@@ -167,6 +224,32 @@ def freeze_control():
         cmds.xform(ctrl, ws=0, m=[1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1])
 
 
+@undo
+def simplify_control(tolerance):
+    # simplify selected controls, return the largest deviation
+    controls = cmds.ls(sl=1, l=1, type=["joint", "transform"])
+    error = max([Control(ctrl).simplify(tolerance) for ctrl in controls] or [0.0])
+    cmds.dgdirty(controls)
+    return error
+
+
+@undo
+def switch_lod(level):
+    # replace selected controls with the lod variant of their library shape
+    # controls without library stamp use the shape named as the control
+    shape_catalog = catalog.get_catalog()
+    controls = cmds.ls(sl=1, l=1, type=["joint", "transform"])
+    for ctrl in controls:
+        library = Control(ctrl).get_library()
+        name = catalog.base_name(library[0]) if library else Control(ctrl).get_name()
+        shape = catalog.lod_name(name, level)
+        if shape_catalog.find(shape) is None:
+            continue
+        kwargs = {key: getattr(Control(ctrl), "get_" + key)() for key in ("color", "outputs", "radius")}
+        Control(ctrl, shape=shape, **kwargs)
+    cmds.dgdirty(controls)
+
+
 @undo
 def line_with_control(weight):
     controls = cmds.listRelatives(cmds.ls(sl=1, l=1), s=1)
@@ -175,11 +258,89 @@ def line_with_control(weight):
     for shape in controls:
         cmds.setAttr(shape + ".lineWidth", weight)
 
+
+def list_controls(roots=None):
+    # get every curve shape under roots, or in the whole scene if no roots given
+    if roots:
+        shapes = cmds.ls(roots, dag=1, l=1, ni=1, type="nurbsCurve") or []
+    else:
+        shapes = cmds.ls(l=1, ni=1, type="nurbsCurve") or []
+    # shape parent is the control, keep scene order and list each control once
+    controls = []
+    visited = set()
+    for shape in shapes:
+        ctrl = shape.rsplit("|", 1)[0]
+        if ctrl not in visited:
+            visited.add(ctrl)
+            controls.append(ctrl)
+    return controls
+
+
+def export_controls(path):
+    """
+    write every control under the selection (or in the scene) to a json lines file
+    one control per line, so the file is written and read without holding the whole rig in memory
+    """
+    with open(path, "w") as fp:
+        for ctrl in list_controls(cmds.ls(sl=1, l=1)):
+            ctrl = Control(ctrl)
+            data = dict(
+                name=ctrl.get_name(),
+                uuid=ctrl.uuid,
+                shape=ctrl.get_shape(),
+                color=ctrl.get_color(),
+                line_width=ctrl.get_line_width(),
+                locked=ctrl.get_locked(),
+                library=ctrl.get_library() or [],
+            )
+            fp.write(json.dumps(data, separators=(",", ":")) + "\n")
+
+
+@undo
+def import_controls(path, key="name"):
+    """
+    apply a file written by export_controls, matching controls by "name" or "uuid"
+    lines are checked before their control is touched, bad lines are skipped
+    return the keys which found no single control in the scene, and "line N: problem" for bad lines
+    """
+    missing = []
+    controls = []
+    with open(path, "r") as fp:
+        for number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            # set_shape deletes the old shapes first, so data must be valid before it is applied
+            try:
+                data = json.loads(line)
+                errors = ["missing " + name for name in (key, "shape", "color", "locked", "line_width")
+                          if name not in data]
+                errors = errors or shapes.check(data["shape"])
+            except (ValueError, TypeError) as e:
+                errors = ["{0}: {1}".format(type(e).__name__, e)]
+            if errors:
+                missing.append("line {0}: {1}".format(number, "; ".join(errors)))
+                continue
+            # search name in every namespace, uuid is unique by itself
+            ctrls = cmds.ls(data[key], r=key == "name", l=1, type=["joint", "transform"])
+            if len(ctrls) != 1:
+                missing.append(data[key])
+                continue
+            # keep outputs like load_control, shape node will be rebuilt
+            # library stamp follows the shape like replace_control, unstamped shapes clear it
+            Control(ctrls[0], shape=data["shape"], color=data["color"], locked=data["locked"],
+                    outputs=Control(ctrls[0]).get_outputs(), line_width=data["line_width"],
+                    library=data.get("library") or [])
+            controls.append(ctrls[0])
+    if controls:
+        cmds.dgdirty(controls)
+    return missing
+
+
 @undo
-def renamer(prefix=None, typ=None):
-    selectList = cmds.ls(sl=True)
-    for index, i in enumerate(selectList):
-        cmds.rename(i, "{0}_{1}_{2}".format(prefix, (index + 1), typ))
+def renamer(prefix=None, typ=None, pattern=rename.PATTERN, padding=0, preview=False):
+    # rename selected nodes through the rename engine, preview return the plan only
+    return rename.rename(cmds.ls(sl=1, l=1), pattern, padding=padding, preview=preview, prefix=prefix, type=typ)
+
 
 @undo
 def creat_ctrl(**kwargs):
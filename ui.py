@@ -9,11 +9,12 @@ except ImportError:
     from PySide6.QtWidgets import *
     from shiboken6 import wrapInstance
 
+from . import atlas
 from . import constraints
+from . import rename
 from . import tools
 import maya.OpenMayaUI as omui
 import maya.cmds as cm
-import os
 
 
 def mayaMainWindow():
@@ -29,15 +30,6 @@ def addMultiConponents(layout, items):
             layout.addLayout(item)
 
 
-index_rgb_map = [[0.5, 0.5, 0.5], [0, 0, 0], [0.247, 0.247, 0.247], [0.498, 0.498, 0.498], [0.608, 0, 0.157],
-                 [0, 0.16, 0.376], [0, 0, 1], [0, 0.275, 0.094], [0.149, 0, 0.263], [0.78, 0, 0.78],
-                 [0.537, 0.278, 0.2], [0.243, 0.133, 0.121], [0.6, 0.145, 0], [1, 0, 0], [0, 1, 0],
-                 [0, 0.2549, 0.6], [1, 1, 1], [1, 1, 0], [0.388, 0.863, 1], [0.263, 1, 0.639], [1, 0.686, 0.686],
-                 [0.89, 0.674, 0.474], [1, 1, 0.388], [0, 0.6, 0.329], [0.627, 0.411, 0.188], [0.619, 0.627, 0.188],
-                 [0.408, 0.631, 0.188], [0.188, 0.631, 0.365], [0.188, 0.627, 0.627], [0.188, 0.403, 0.627],
-                 [0.434, 0.188, 0.627], [0.627, 0.188, 0.411]]
-
-
 class ShapeListWindow(QWidget):
     def __init__(self):
         super(ShapeListWindow, self).__init__()
@@ -76,10 +68,12 @@ class ShapeListWindow(QWidget):
         self.mirrorBtn = QPushButton("mirror")
         self.replaceBtn = QPushButton("replace")
         self.freezeBtn = QPushButton("freeze")
+        self.autoColorBtn = QPushButton("auto color")
 
     def createLayout(self):
         self.btnLayout = QHBoxLayout()
-        addMultiConponents(self.btnLayout, [self.scaleBtn, self.mirrorBtn, self.replaceBtn, self.freezeBtn])
+        addMultiConponents(self.btnLayout, [self.scaleBtn, self.mirrorBtn, self.replaceBtn, self.freezeBtn,
+                                            self.autoColorBtn])
 
         self.sldLayout = QFormLayout()
         self.sldLayout.addRow("Line Width:", self.curWithSld)
@@ -97,37 +91,57 @@ class ShapeListWindow(QWidget):
         self.mirrorBtn.clicked.connect(tools.mirror_control)
         self.replaceBtn.clicked.connect(tools.replace_control)
         self.freezeBtn.clicked.connect(tools.freeze_control)
+        self.autoColorBtn.clicked.connect(lambda: tools.auto_color())
 
     def updateShapes(self):
         # clear original menu
         self.shapeList.clear()
-        # get data folder path
-        data_dir = os.path.abspath(__file__ + "/../data/")
-        # loop data folder item
-        for file_name in os.listdir(data_dir):
-            if not file_name.endswith(".jpg"):
-                continue
-            jpg_file = os.path.join(data_dir, file_name)
-            item = QListWidgetItem(QIcon(jpg_file), "", self.shapeList)
-            name, _ = os.path.splitext(file_name)
+        # loop catalog shapes, icons are sliced from the cached thumbnail atlas
+        for name, pix in atlas.get_shape_icons():
+            item = QListWidgetItem(QIcon(pix), "", self.shapeList)
             item.name = name
+            item.setToolTip(name)
             item.setSizeHint(QSize(67, 67))
 
     def updateColors(self):
-        for rgb in index_rgb_map:
-            pix = QPixmap(32, 16)
-            pix.fill(QColor.fromRgbF(*rgb))
+        for pix in atlas.get_color_swatches():
             item = QListWidgetItem(QIcon(pix), "", self.colorList)
             item.setSizeHint(QSize(35, 17))
 
     def contextMenuEvent(self, event):
         menu = QMenu(self)
         menu.addAction(u"upload controller", tools.upload_control)
+        menu.addAction(u"refresh scene controllers", tools.refresh_controls)
         menu.addAction(u"delete controller",
                        lambda: tools.delete_controls([item.name for item in self.shapeList.selectedItems()]))
+        menu.addSeparator()
+        menu.addAction(u"simplify controller", self.simplifyControls)
+        menu.addAction(u"switch to light controllers", lambda: tools.switch_lod(1))
+        menu.addAction(u"switch to full controllers", lambda: tools.switch_lod(0))
+        menu.addSeparator()
+        menu.addAction(u"export rig controls", self.exportControls)
+        menu.addAction(u"import rig controls", self.importControls)
         menu.exec_(event.globalPos())
         self.updateShapes()
 
+    def simplifyControls(self):
+        tolerance, ok = QInputDialog.getDouble(self, "Simplify Controls", "Tolerance:", 0.05, 0.0001, 10.0, 4)
+        if ok:
+            cm.inViewMessage(amg="largest deviation {0:.4f}".format(tools.simplify_control(tolerance)),
+                             pos="topCenter", fade=True)
+
+    def exportControls(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Controls", "", "Control Files (*.jsonl)")
+        if path:
+            tools.export_controls(path)
+
+    def importControls(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Controls", "", "Control Files (*.jsonl)")
+        if path:
+            missing = tools.import_controls(path)
+            if missing:
+                cm.warning("controls not imported: " + ", ".join(missing))
+
 
 class ConstraintsWindow(QWidget):
     def __init__(self):
@@ -140,6 +154,11 @@ class ConstraintsWindow(QWidget):
     def createWidgets(self):
         self.rnPrefixLe = QLineEdit()
         self.rnTypeLe = QLineEdit()
+        self.rnPatternLe = QLineEdit(rename.PATTERN)
+        self.rnPaddingSb = QSpinBox()
+        self.rnPaddingSb.setFixedWidth(50)
+        self.rnPaddingSb.setRange(0, 8)
+        self.rePreviewBtn = QPushButton("Preview")
         self.reNameBtn = QPushButton("Apply")
 
         self.ctrlSizeSld = QSlider(Qt.Horizontal)
@@ -176,10 +195,13 @@ class ConstraintsWindow(QWidget):
     def createLayout(self):
         self.renameBtnLayout = QHBoxLayout()
         self.renameBtnLayout.addStretch()
+        self.renameBtnLayout.addWidget(self.rePreviewBtn)
         self.renameBtnLayout.addWidget(self.reNameBtn)
         self.renameFormLayout = QFormLayout()
         self.renameFormLayout.addRow("Prefix:", self.rnPrefixLe)
         self.renameFormLayout.addRow("Type:", self.rnTypeLe)
+        self.renameFormLayout.addRow("Pattern:", self.rnPatternLe)
+        self.renameFormLayout.addRow("Padding:", self.rnPaddingSb)
         self.renameFormLayout.addRow("", self.renameBtnLayout)
         self.rNGroupBox = QGroupBox("Renamer")
         self.rNGroupBox.setFixedWidth(330)
@@ -264,6 +286,7 @@ class ConstraintsWindow(QWidget):
         self.setLayout(self.scrollLayout)
 
     def createConnections(self):
+        self.rePreviewBtn.clicked.connect(self.reNamePreview)
         self.reNameBtn.clicked.connect(self.reNameApply)
         self.ctrlCreateBtn.clicked.connect(self.ctrlCreateApply)
         self.polVecBtn.clicked.connect(self.polerVecApply)
@@ -272,7 +295,29 @@ class ConstraintsWindow(QWidget):
     def reNameApply(self):
         prefix = self.rnPrefixLe.text()
         typ = self.rnTypeLe.text()
-        tools.renamer(prefix=prefix, typ=typ)
+        try:
+            tools.renamer(prefix=prefix, typ=typ, pattern=self.rnPatternLe.text(), padding=self.rnPaddingSb.value())
+        except KeyError as e:
+            cm.warning("rename failed: unknown token {0}".format(e))
+        except (IndexError, ValueError, RuntimeError) as e:
+            cm.warning("rename failed: {0}".format(e))
+
+    def reNamePreview(self):
+        prefix = self.rnPrefixLe.text()
+        typ = self.rnTypeLe.text()
+        try:
+            entries = tools.renamer(prefix=prefix, typ=typ, pattern=self.rnPatternLe.text(),
+                                    padding=self.rnPaddingSb.value(), preview=True)
+        except KeyError as e:
+            cm.warning("rename failed: unknown token {0}".format(e))
+            return
+        except (IndexError, ValueError) as e:
+            cm.warning("rename failed: {0}".format(e))
+            return
+        clashes = [new for old, new, clash in entries if clash]
+        if clashes:
+            cm.warning("name clash: " + ", ".join(sorted(set(clashes))))
+        RenamePreviewDialog(entries, self).exec_()
 
     def ctrlCreateApply(self):
         size = self.ctrlSizeSld.value()
@@ -304,9 +349,40 @@ class ConstraintsWindow(QWidget):
             tools.creat_curClu(cur=curveTarget)
 
 
+class RenamePreviewDialog(QDialog):
+    def __init__(self, entries, parent=None):
+        super(RenamePreviewDialog, self).__init__(parent)
+        self.setWindowTitle("Rename Preview")
+        self.resize(QSize(420, 300))
+
+        self.planTw = QTableWidget(len(entries), 2)
+        self.planTw.setHorizontalHeaderLabels(["Old Name", "New Name"])
+        self.planTw.horizontalHeader().setStretchLastSection(True)
+        self.planTw.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        for row, (old, new, clash) in enumerate(entries):
+            self.planTw.setItem(row, 0, QTableWidgetItem(old))
+            item = QTableWidgetItem(new + ("  (clash)" if clash else ""))
+            if clash:
+                item.setForeground(QColor(255, 80, 80))
+            self.planTw.setItem(row, 1, item)
+        self.planTw.resizeColumnsToContents()
+
+        self.closeBtn = QPushButton("Close")
+        self.closeBtn.clicked.connect(self.close)
+        self.btnLayout = QHBoxLayout()
+        self.btnLayout.addStretch()
+        self.btnLayout.addWidget(self.closeBtn)
+
+        self.mainLayout = QVBoxLayout()
+        self.mainLayout.addWidget(self.planTw)
+        self.mainLayout.addLayout(self.btnLayout)
+        self.setLayout(self.mainLayout)
+
+
 class MainWindow(QDialog):
-    def __init__(self, parent=mayaMainWindow()):
-        super(MainWindow, self).__init__(parent)
+    def __init__(self, parent=None):
+        # main window is looked up on creation, so the module can be imported in mayapy
+        super(MainWindow, self).__init__(parent or mayaMainWindow())
         self.setWindowTitle("ZzControlLib")
         self.resize(QSize(380, 470))
 
@@ -0,0 +1,70 @@
+"""
+Scripted plugin with one undoable command which runs an api modifier built in python
+MDagModifier.doIt outside of an MPxCommand is not recorded by the maya undo queue,
+undoable.run(modifier) puts the modifier on it, so ctrl+z reverts it like any cmds edit.
+Maya loads this file as a plugin by path, the command gets the modifier from the package module.
+"""
+import os
+import sys
+
+from maya import cmds
+from maya.api import OpenMaya
+
+COMMAND = "controlLibModifier"
+PACKAGE = os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+
+# modifier waiting for the next command call
+pending = None
+
+
+def maya_useNewAPI():
+    # plugin uses maya.api.OpenMaya
+    pass
+
+
+class ModifierCommand(OpenMaya.MPxCommand):
+    def __init__(self):
+        super(ModifierCommand, self).__init__()
+        self.modifier = None
+
+    def doIt(self, args):
+        module = sys.modules[PACKAGE + ".undoable"]
+        self.modifier, module.pending = module.pending, None
+        if self.modifier is None:
+            raise RuntimeError("{0} must be called from undoable.run".format(COMMAND))
+        self.modifier.doIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def creator():
+    return ModifierCommand()
+
+
+def initializePlugin(plugin):
+    OpenMaya.MFnPlugin(plugin).registerCommand(COMMAND, creator)
+
+
+def uninitializePlugin(plugin):
+    OpenMaya.MFnPlugin(plugin).deregisterCommand(COMMAND)
+
+
+def run(modifier):
+    # doIt the modifier through the undoable command, load the plugin on first use
+    global pending
+    path = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+    if not cmds.pluginInfo(path, q=1, loaded=1):
+        cmds.loadPlugin(path, quiet=1)
+    pending = modifier
+    try:
+        getattr(cmds, COMMAND)()
+    finally:
+        pending = None
+    return modifier